@@ -1,33 +1,64 @@
 import requests
+from requests.adapters import HTTPAdapter
 import json
+try:
+    import orjson  # Optional C JSON parser, noticeably faster on large payloads
+except ImportError:
+    orjson = None
 import sys
-import math
 import time
-import datetime
+import functools
+import logging
+import zlib
 import os
 import re
+import threading
+from dataclasses import dataclass, field
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, 
-    QGridLayout, QLabel, QListWidget, QListWidgetItem, QDialog, 
+    QGridLayout, QLabel, QListWidget, QDialog, 
     QPushButton, QHBoxLayout, QStatusBar, QMessageBox, QTextEdit, 
     QMenuBar, QMenu, QSpinBox, QFormLayout
 )
 from PyQt6.QtCore import (
-    QObject, QThread, pyqtSignal, QTimer, Qt, QRunnable, QThreadPool
+    QObject, QThread, pyqtSignal, QTimer, Qt, QRunnable, QThreadPool, QSignalBlocker
 )
 from PyQt6.QtGui import QFont, QIcon
 
+logger = logging.getLogger(__name__)
+
 # ==============================================================================
 # CONFIGURATION CONSTANTS
 # ==============================================================================
 # Base filename pattern for configuration files: ncmonitor.txt, ncmonitor_1.txt, etc.
-CONFIG_FILE_PATTERN = re.compile(r"ncmonitor(?:[_\w]+)?\.txt$") 
+CONFIG_FILE_PATTERN = re.compile(r"ncmonitor\w*\.txt")  # Used with fullmatch()
 # API endpoint for server info
 API_SUFFIX = "/ocs/v2.php/apps/serverinfo/api/v1/info?format=json"
 # Default time in milliseconds for GUI auto-refresh (60000ms = 1 minute)
 DEFAULT_REFRESH_INTERVAL_MS = 60000 
+# Adaptive backoff: wait at least LATENCY_BACKOFF_FACTOR x the average fetch
+# time, but never more than MAX_BACKOFF_MULTIPLIER x the configured interval
+LATENCY_BACKOFF_FACTOR = 20
+MAX_BACKOFF_MULTIPLIER = 4
+# Stale-while-revalidate for the dashboard when switching back to a server:
+# cached data younger than SNAPSHOT_MAX_AGE_S is shown without fetching, data
+# up to SNAPSHOT_SWR_WINDOW_S older is shown while a fresh fetch runs
+SNAPSHOT_MAX_AGE_S = 10
+SNAPSHOT_SWR_WINDOW_S = 60
+# Weight of the newest sample in the per-server fetch latency moving average
+LATENCY_EMA_ALPHA = 0.3
 # Multiplier to convert Kilobytes (KB) from the API response to Bytes
 KB_TO_BYTES = 1024 
+# Max pooled keep-alive connections kept open per Nextcloud host
+HTTP_POOL_MAXSIZE = 4
+# Seconds a fetched response is reused before the API is queried again
+METRICS_CACHE_TTL_S = 5
+# Upper bound on concurrent fetch threads in the shared QThreadPool
+MAX_FETCH_THREADS = 8
+# Byte marker of a successful OCS response, checked before walking the parsed meta
+OK_STATUS_MARKER = b'"status":"ok"'
+# Keys under ocs.data that the dashboard reads; everything else is dropped after parsing
+UI_DATA_KEYS = ('nextcloud', 'server', 'activeUsers', 'app')
 # ==============================================================================
 
 # ==============================================================================
@@ -123,6 +154,14 @@ LIGHT_THEME_QSS = """
         color: #333; 
     }
 """
+
+def minify_qss(qss):
+    """Strips comments and collapses whitespace so Qt's QSS parser has less to tokenize."""
+    qss = re.sub(r'/\*.*?\*/', '', qss, flags=re.S)
+    return re.sub(r'\s+', ' ', qss).strip()
+
+DARK_THEME_QSS = minify_qss(DARK_THEME_QSS)
+LIGHT_THEME_QSS = minify_qss(LIGHT_THEME_QSS)
 # ==============================================================================
 
 
@@ -132,6 +171,10 @@ LIGHT_THEME_QSS = """
 
 def safe_int(value):
     """Converts a value to an integer, defaulting to 0 if conversion fails."""
+    if type(value) is int:
+        # Most numeric API fields already arrive as ints; an exact type check
+        # skips the isinstance MRO walk (bools fall through to int(float()))
+        return value
     if value is None or value == '':
         return 0
     try:
@@ -140,22 +183,33 @@ def safe_int(value):
     except (ValueError, TypeError):
         return 0
 
+_TIMEDELTA_UNITS = ('years', 'days', 'hours', 'minutes')
+
+def _timedelta_parts(seconds):
+    """Splits a positive duration into (years, days, hours, minutes, seconds)."""
+    years, seconds = divmod(seconds, 31536000)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    return years, days, hours, minutes, seconds
+
+
 def format_timedelta(seconds):
     """Converts a duration in seconds into a human-readable string."""
-    seconds = safe_int(seconds)
+    return _format_timedelta(safe_int(seconds))
+
+
+@functools.lru_cache(maxsize=512)
+def _format_timedelta(seconds):
+    """Memoized core of format_timedelta, keyed on the plain int duration."""
     if seconds <= 0:
         return "N/A or Fresh Start"
     
-    intervals = (
-        ('years', 31536000), ('days', 86400),
-        ('hours', 3600), ('minutes', 60),
-    )
+    *unit_values, seconds = _timedelta_parts(seconds)
     
     result = []
-    for name, count in intervals:
-        value = seconds // count
+    for name, value in zip(_TIMEDELTA_UNITS, unit_values):
         if value:
-            seconds -= value * count
             result.append(f"{value} {name}" if value > 1 else f"{value} {name.rstrip('s')}")
             
     if not result and seconds > 0:
@@ -167,8 +221,18 @@ def format_timedelta(seconds):
 def read_config_file(config_filepath):
     """Reads the configuration (URL and Token) from the specified text file."""
     try:
-        with open(config_filepath, 'r') as f:
-            lines = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        with open(config_filepath, 'rb') as f:
+            raw = f.read()
+
+        # Only the first two non-empty, non-comment lines matter (URL and Token)
+        lines = []
+        for raw_line in raw.splitlines():
+            raw_line = raw_line.strip()
+            if not raw_line or raw_line.startswith(b'#'):
+                continue
+            lines.append(raw_line.decode('utf-8', 'replace'))
+            if len(lines) == 2:
+                break
 
         if len(lines) < 2:
             raise ValueError("Configuration file requires at least two lines: URL and Token.")
@@ -190,9 +254,15 @@ def read_config_file(config_filepath):
 def find_and_load_configs(script_dir):
     """Scans the directory for ncmonitor*.txt files and loads the URL/Token from each."""
     config_list = []
-    for filename in os.listdir(script_dir):
-        if CONFIG_FILE_PATTERN.match(filename):
-            full_path = os.path.join(script_dir, filename)
+    with os.scandir(script_dir) as entries:
+        for entry in entries:
+            filename = entry.name
+            # Cheap suffix test first so most files never reach the regex
+            if not filename.endswith('.txt') or not entry.is_file():
+                continue
+            if not CONFIG_FILE_PATTERN.fullmatch(filename):
+                continue
+            full_path = entry.path
             try:
                 nc_url, nc_token = read_config_file(full_path)
                 
@@ -206,61 +276,406 @@ def find_and_load_configs(script_dir):
                     'path': full_path
                 })
             except Exception as e:
-                print(f"Warning: Skipping invalid config file {filename}. Error: {e}")
+                logger.warning("Skipping invalid config file %s. Error: %s", filename, e)
                 continue
                 
     return config_list
 
 
+# Unit names and matching divisors (1 << 10*i == 1024 ** i) for format_bytes
+_SIZES = ('Bytes', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB', 'ZB', 'YB')
+_DIV = tuple(1 << (10 * i) for i in range(len(_SIZES)))
+_MAX_UNIT = len(_SIZES) - 1
+
 def format_bytes(bytes_value, decimals=2):
     """Converts a number of bytes into a human-readable string (e.g., KB, MB, GB, TB)."""
-    bytes_value = safe_int(bytes_value)
+    return _format_bytes(safe_int(bytes_value), decimals)
+
 
+@functools.lru_cache(maxsize=1024)
+def _format_bytes(bytes_value, decimals):
+    """Memoized core of format_bytes; storage totals rarely change between refreshes."""
     if bytes_value == 0:
         return '0 Bytes'
     
-    k = 1024
     dm = decimals if decimals >= 0 else 0
-    sizes = ['Bytes', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB', 'ZB', 'YB']
-    
-    i = 0
-    if bytes_value > 0:
-        i = math.floor(math.log(bytes_value, k))
-        i = min(i, len(sizes) - 1)
+    # (bit_length - 1) // 10 == floor(log1024(n)) exactly for positive ints; a
+    # float log() rounds values just below large powers of 1024 up a unit
+    i = 0 if bytes_value < 0 else min((bytes_value.bit_length() - 1) // 10, _MAX_UNIT)
         
-    return f"{bytes_value / (k ** i):.{dm}f} {sizes[i]}"
+    return f"{bytes_value / _DIV[i]:.{dm}f} {_SIZES[i]}"
+
+
+# One requests.Session per server URL so each host keeps its own keep-alive
+# socket between refreshes instead of paying a new TCP+TLS handshake per poll.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+def get_session(nc_url):
+    """Returns the pooled requests.Session for the given server, creating it on first use."""
+    session = _SESSIONS.get(nc_url)
+    if session is None:
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(nc_url)
+            if session is None:
+                session = requests.Session()
+                # Headers common to every request are sent from the session
+                session.headers.update({
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json',
+                    'Connection': 'keep-alive'
+                })
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _SESSIONS[nc_url] = session
+    return session
+
+
+def close_sessions():
+    """Closes every pooled session, releasing their keep-alive sockets at shutdown."""
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+        _SESSIONS.clear()
+
+
+# Parses raw response bytes; both parsers return the same dict shape
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+def dumps_pretty(data):
+    """Serializes data as 2-space indented JSON text for the Raw Data tab."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+def trim_metrics(data):
+    """Keeps only the parts of the serverinfo payload consumed by the UI."""
+    ocs = data.get('ocs', {})
+    ocs_data = ocs.get('data', {})
+    return {
+        'ocs': {
+            'meta': ocs.get('meta', {}),
+            'data': {key: ocs_data[key] for key in UI_DATA_KEYS if key in ocs_data},
+        }
+    }
+
+
+# Last good response per (api_url, token) as {'ts', 'data', 'etag', 'digest'},
+# where ts is a time.monotonic() timestamp and digest is hash() of the raw body.
+# Serves repeated fetches within METRICS_CACHE_TTL_S, revalidates with
+# If-None-Match when the server sent an ETag, skips re-parsing a byte-identical
+# body, and acts as the stale fallback when the server is unreachable.
+_CACHE = {}
+
+def expire_cached_metrics(nc_url, nc_token):
+    """Forces the next fetch for a server to hit the API, keeping the entry as a stale fallback."""
+    cached = _CACHE.get((nc_url.rstrip('/') + API_SUFFIX, nc_token))
+    if cached is not None:
+        cached['ts'] = float('-inf')
 
 
 def fetch_metrics(nc_url, nc_token):
-    """Fetches Nextcloud server metrics and returns the data dictionary."""
+    """Fetches Nextcloud server metrics and returns (data, stale).
+
+    Responses younger than METRICS_CACHE_TTL_S are served from the cache, and
+    a 304 Not Modified answer to If-None-Match, or a body identical to the
+    cached one, reuses the cached data without parsing it again. On a
+    connection error or timeout the last good response is returned instead,
+    with stale set to True.
+    """
     api_url = nc_url.rstrip('/') + API_SUFFIX
-    headers = {
-        'NC-Token': nc_token,
-        'Content-Type': 'application/json'
-    }
+    cache_key = (api_url, nc_token)
+    cached = _CACHE.get(cache_key)
+    if cached is not None and time.monotonic() - cached['ts'] < METRICS_CACHE_TTL_S:
+        return cached['data'], False
+
+    headers = {'NC-Token': nc_token}
+    if cached is not None and cached['etag']:
+        headers['If-None-Match'] = cached['etag']
 
     try:
-        response = requests.get(api_url, headers=headers, timeout=15)
+        response = get_session(nc_url).get(api_url, headers=headers, timeout=15)
         response.raise_for_status() 
+
+        if response.status_code == 304 and cached is not None:
+            cached['ts'] = time.monotonic()
+            return cached['data'], False
         
-        data = response.json()
+        body = response.content
+        # An idle server returns byte-identical JSON; skip parsing it again
+        digest = hash(body)
+        if cached is not None and cached['digest'] == digest:
+            cached['ts'] = time.monotonic()
+            cached['etag'] = response.headers.get('ETag')
+            return cached['data'], False
+
+        # Login/proxy pages come back as HTML with a 200 status; reject them without parsing
+        if body[:64].lstrip()[:1] != b'{':
+            raise Exception("Response is not JSON (login page or proxy error?). Check URL.")
+
+        data = _json_loads(body)
         
-        meta = data.get('ocs', {}).get('meta', {})
-        if meta.get('status') != 'ok':
-            raise Exception(f"API Status Error: {meta.get('message', 'Unknown error')}")
-
-        return data
+        # The compact "ok" marker sits near the top of the payload; only walk
+        # the parsed meta when it is absent, to extract the real error message
+        if OK_STATUS_MARKER not in body[:512]:
+            meta = data.get('ocs', {}).get('meta', {})
+            if meta.get('status') != 'ok':
+                raise Exception(f"API Status Error: {meta.get('message', 'Unknown error')}")
+
+        data = trim_metrics(data)
+
+        _CACHE[cache_key] = {
+            'ts': time.monotonic(),
+            'data': data,
+            'etag': response.headers.get('ETag'),
+            'digest': digest,
+        }
+        return data, False
 
     except requests.exceptions.HTTPError as err:
         raise Exception(f"HTTP Error: {err}. Check URL/Token.")
     except requests.exceptions.ConnectionError as err:
+        if cached is not None:
+            return cached['data'], True
         raise Exception(f"Connection Error: {err}. Server unreachable.")
     except requests.exceptions.Timeout:
+        if cached is not None:
+            return cached['data'], True
         raise Exception("Request timed out after 15 seconds.")
     except Exception as err:
         # Wrap any unexpected error for consistency
         raise Exception(f"An unexpected error occurred: {err}")
 
+
+# ------------------------------------------------------------------------------
+# Metric extraction plan
+# ------------------------------------------------------------------------------
+
+def _dig(node, path, default=None):
+    """Follows a key/index path through nested dicts and lists, returning default if any step is missing."""
+    for key in path:
+        if isinstance(node, dict):
+            node = node.get(key)
+        elif isinstance(node, list) and isinstance(key, int) and key < len(node):
+            node = node[key]
+        else:
+            return default
+        if node is None:
+            return default
+    return node
+
+
+def _fmt_thousands(value):
+    return f"{value:,}"
+
+def _fmt_yes_no(value):
+    return 'Yes' if value else 'No'
+
+def _fmt_load(value):
+    return f"{value:.2f}"
+
+def _fmt_percent(value):
+    return f"{value:.2f}%"
+
+def _fmt_seconds(value):
+    return f"{value}s"
+
+def _fmt_kb(value):
+    return format_bytes(safe_int(value) * KB_TO_BYTES)
+
+
+def _used_kb(ocs_data, total_key, free_key):
+    """Returns total - free for a pair of KB counters in nextcloud.system."""
+    system_info = _dig(ocs_data, ('nextcloud', 'system'), {})
+    return safe_int(system_info.get(total_key, 0)) - safe_int(system_info.get(free_key, 0))
+
+# Derived metrics receive the whole ocs.data dict
+def _ram_used(ocs_data):
+    return format_bytes(_used_kb(ocs_data, 'mem_total', 'mem_free') * KB_TO_BYTES)
+
+def _swap_used(ocs_data):
+    return format_bytes(_used_kb(ocs_data, 'swap_total', 'swap_free') * KB_TO_BYTES)
+
+def _php_uptime(ocs_data):
+    start_time_ts = safe_int(_dig(ocs_data, ('server', 'php', 'opcache', 'opcache_statistics', 'start_time'), 0))
+    current_time_ts = int(time.time())
+    uptime_seconds = current_time_ts - start_time_ts if start_time_ts > 0 and current_time_ts > start_time_ts else 0
+    return format_timedelta(uptime_seconds)
+
+def _storage_missing(ocs_data):
+    storage_data = _dig(ocs_data, ('nextcloud', 'storage'), {})
+    return safe_int(storage_data.get('used')) == 0 and safe_int(storage_data.get('free')) == 0
+
+def _storage_used(ocs_data):
+    # Fallback logic retained: used/free of 0 means the storage block is missing
+    if _storage_missing(ocs_data):
+        return "0 Bytes (Data Missing)"
+    return format_bytes(_dig(ocs_data, ('nextcloud', 'storage', 'used')))
+
+def _storage_free(ocs_data):
+    if _storage_missing(ocs_data):
+        freespace = _dig(ocs_data, ('nextcloud', 'system', 'freespace'))
+        return f"{format_bytes(freespace)} (System Freespace)"
+    return format_bytes(_dig(ocs_data, ('nextcloud', 'storage', 'free')))
+
+def _app_lists(ocs_data):
+    """Returns the (enabled, installed) app lists, or None when the API omits app data."""
+    app_data = ocs_data.get('app', None)
+    if app_data and isinstance(app_data, dict):
+        enabled_apps = app_data.get('enabled', [])
+        installed_apps = app_data.get('installed', [])
+        if isinstance(enabled_apps, list) and isinstance(installed_apps, list):
+            return enabled_apps, installed_apps
+    return None
+
+def _enabled_app_count(ocs_data):
+    app_lists = _app_lists(ocs_data)
+    return str(len(app_lists[0])) if app_lists else "N/A (Data Missing)"
+
+def _installed_app_count(ocs_data):
+    app_lists = _app_lists(ocs_data)
+    return str(len(app_lists[1])) if app_lists else "N/A (Data Missing)"
+
+
+# (label_key, path under ocs.data, default, formatter). A path of None marks a
+# derived metric whose formatter receives the whole ocs.data dict. Ordered like
+# the labels are created in the tabs.
+METRIC_SPEC = (
+    # Core Metrics
+    ('version_val', ('nextcloud', 'system', 'version'), 'N/A', str),
+    ('php_uptime_val', None, None, _php_uptime),
+    ('users_val', ('nextcloud', 'storage', 'num_users'), 0, str),
+    ('files_val', ('nextcloud', 'storage', 'num_files'), 0, _fmt_thousands),
+    ('webserver_val', ('server', 'webserver'), 'N/A', str),
+    ('cpunum_val', ('nextcloud', 'system', 'cpunum'), 'N/A', str),
+    # System Health (with KB to Bytes correction)
+    ('ram_used_val', None, None, _ram_used),
+    ('ram_total_val', ('nextcloud', 'system', 'mem_total'), 0, _fmt_kb),
+    ('swap_used_val', None, None, _swap_used),
+    ('cpu1m_val', ('nextcloud', 'system', 'cpuload', 0), 0, _fmt_load),
+    ('cpu5m_val', ('nextcloud', 'system', 'cpuload', 1), 0, _fmt_load),
+    ('cpu15m_val', ('nextcloud', 'system', 'cpuload', 2), 0, _fmt_load),
+    ('opcache_hit_rate_val', ('server', 'php', 'opcache', 'opcache_statistics', 'opcache_hit_rate'), 0.0, _fmt_percent),
+    ('opcache_used_val', ('server', 'php', 'opcache', 'memory_usage', 'used_memory'), 0, format_bytes),
+    ('opcache_wasted_val', ('server', 'php', 'opcache', 'memory_usage', 'wasted_memory'), 0, format_bytes),
+    # Activity & Security
+    ('active5m_val', ('activeUsers', 'last5minutes'), 0, str),
+    ('active1h_val', ('activeUsers', 'last1hour'), 0, str),
+    ('active24h_val', ('activeUsers', 'last24hours'), 0, str),
+    ('failed_logins_val', ('nextcloud', 'system', 'failing_login_attempts'), 0, str),
+    ('maintenance_val', ('nextcloud', 'system', 'maintenance'), False, _fmt_yes_no),
+    ('total_shares_val', ('nextcloud', 'shares', 'num_shares'), 0, str),
+    ('local_shares_val', ('nextcloud', 'shares', 'num_shares_user'), 0, str),
+    ('federated_shares_val', ('nextcloud', 'shares', 'num_fed_shares_sent'), 0, str),
+    ('public_shares_val', ('nextcloud', 'shares', 'num_shares_link'), 0, str),
+    # Storage Overview
+    ('storage_used_val', None, None, _storage_used),
+    ('storage_free_val', None, None, _storage_free),
+    ('db_size_val', ('server', 'database', 'size'), 0, format_bytes),
+    ('enabled_apps_val', None, None, _enabled_app_count),
+    ('app_count_val', None, None, _installed_app_count),
+    # Configuration
+    ('php_val', ('server', 'php', 'version'), 'N/A', str),
+    ('php_memory_limit_val', ('server', 'php', 'memory_limit'), 0, format_bytes),
+    ('php_max_exec_val', ('server', 'php', 'max_execution_time'), 'N/A', _fmt_seconds),
+    ('db_type_val', ('server', 'database', 'type'), 'N/A', str),
+    ('db_version_val', ('server', 'database', 'version'), 'N/A', str),
+    ('db_host_val', ('server', 'database', 'host'), 'N/A', str),
+)
+
+# Each spec path split into (parent path, final key). Many metrics share a
+# parent such as nextcloud.system, which build_updates resolves only once.
+_SPEC_STEPS = tuple(
+    (path[:-1], path[-1:]) if path is not None else (None, None)
+    for _label_key, path, _default, _formatter in METRIC_SPEC
+)
+
+
+@dataclass(frozen=True)
+class NcSnapshot:
+    """Immutable, display-ready view of one serverinfo response."""
+    # Label texts, ordered like METRIC_SPEC
+    values: tuple
+    # (id, version) pairs of enabled apps, or None when the API omits app data
+    enabled_apps: tuple
+    # Sorted, newline-joined text for the enabled apps list (derived from enabled_apps)
+    app_list: str = field(default="", compare=False)
+    # True when the data is the last good response served while the server was unreachable
+    stale: bool = False
+    # Wall time spent in fetch_metrics, used to adapt the refresh interval
+    fetch_seconds: float = field(default=0.0, compare=False)
+    # (url, token) of the server the data came from
+    server: tuple = field(default=None, compare=False)
+    # Full (trimmed) response for the Raw Data tab; excluded from equality and hashing
+    raw_data: dict = field(default=None, compare=False)
+
+
+def build_updates(ocs_data):
+    """Runs METRIC_SPEC over ocs.data and returns the label texts in spec order.
+
+    Each metric is formatted independently, so one malformed field shows
+    "N/A" instead of discarding the whole refresh.
+    """
+    values = []
+    append = values.append
+    parents = {} # parent path -> resolved node, shared by sibling metrics
+    for (label_key, path, default, formatter), (parent_path, leaf) in zip(METRIC_SPEC, _SPEC_STEPS):
+        try:
+            if path is None:
+                value = ocs_data
+            else:
+                if parent_path in parents:
+                    parent = parents[parent_path]
+                else:
+                    parent = parents[parent_path] = _dig(ocs_data, parent_path)
+                value = _dig(parent, leaf, default)
+            append(formatter(value))
+        except Exception as e:
+            logger.debug("Could not format %s: %s", label_key, e)
+            append("N/A")
+    return tuple(values)
+
+
+# The app list rarely changes between refreshes, so the sort and join are
+# memoized on the hashable (id, version) tuple; a few entries cover switching servers
+@functools.lru_cache(maxsize=8)
+def format_app_list(enabled_apps):
+    """Returns the sorted "name: vX" lines shown in the enabled apps list."""
+    if enabled_apps is None:
+        return "APP DATA IS MISSING FROM NEXTCLOUD API RESPONSE."
+    return "\n".join(sorted(
+        f"{app_name}: v{app_version}" for app_name, app_version in enabled_apps
+    ))
+
+
+def build_snapshot(data, fetch_seconds=0.0, server=None, stale=False):
+    """Extracts and formats the displayed fields of a serverinfo response into an NcSnapshot."""
+    ocs_data = data['ocs']['data']
+    if not isinstance(ocs_data, dict):
+        raise ValueError("Unexpected 'ocs.data' in API response.")
+
+    enabled_apps = None
+    app_lists = _app_lists(ocs_data)
+    if app_lists is not None:
+        apps = []
+        for app in app_lists[0]:
+            if isinstance(app, dict):
+                apps.append((app.get('id', 'Unknown App'), app.get('version', 'N/A')))
+            elif isinstance(app, str):
+                apps.append((app, 'N/A'))
+        enabled_apps = tuple(apps)
+
+    return NcSnapshot(
+        values=build_updates(ocs_data),
+        enabled_apps=enabled_apps,
+        app_list=format_app_list(enabled_apps),
+        stale=stale,
+        fetch_seconds=fetch_seconds,
+        server=server,
+        raw_data=data,
+    )
+
 # ==============================================================================
 # PYQT6 THREADING AND WORKER CLASSES
 # ==============================================================================
@@ -276,16 +691,44 @@ class NextcloudWorker(QRunnable):
     def run(self):
         """Fetches data and emits the results or an error."""
         try:
-            data = fetch_metrics(self.nc_url, self.nc_token)
-            self.signals.data_fetched.emit(data)
+            t0 = time.monotonic()
+            data, stale = fetch_metrics(self.nc_url, self.nc_token)
+            fetch_seconds = time.monotonic() - t0
+        except Exception as e:
+            self.signals.error.emit(str(e), (self.nc_url, self.nc_token))
+            return
+
+        try:
+            snapshot = build_snapshot(data, fetch_seconds, (self.nc_url, self.nc_token), stale)
         except Exception as e:
-            self.signals.error.emit(str(e))
+            self.signals.error.emit(f"Failed to process fetched data: {type(e).__name__}: {e}", (self.nc_url, self.nc_token))
+            return
+
+        self.signals.data_fetched.emit(snapshot)
 
 
 class WorkerSignals(QObject):
     """Defines the signals available from a running worker thread."""
-    data_fetched = pyqtSignal(dict) # Data dictionary emitted upon success
-    error = pyqtSignal(str)         # Error message emitted upon failure
+    data_fetched = pyqtSignal(object) # NcSnapshot emitted upon success
+    error = pyqtSignal(str, object)   # Error message and (url, token) emitted upon failure
+
+
+# ==============================================================================
+# PYQT6 SHARED RESOURCES
+# ==============================================================================
+
+@functools.lru_cache(maxsize=None)
+def cached_font(family, point_size, weight=None):
+    """Returns a shared QFont, built on first use (after QApplication exists) to skip repeated font lookups."""
+    if weight is None:
+        return QFont(family, point_size)
+    return QFont(family, point_size, weight)
+
+
+@functools.lru_cache(maxsize=None)
+def cached_icon(path):
+    """Returns a shared QIcon so the image file is decoded only once."""
+    return QIcon(path)
 
 
 # ==============================================================================
@@ -297,7 +740,9 @@ class ServerSelectionDialog(QDialog):
     def __init__(self, parent, configs, current_config):
         super().__init__(parent)
         self.setWindowTitle("Select Nextcloud Server")
-        self.configs = configs
+        self.configs = tuple(configs)
+        # Row lookup by config name, used to restore the current selection
+        self._name_index = {config['name']: idx for idx, config in enumerate(self.configs)}
         self.selected_config = None
         
         self.setModal(True)
@@ -306,7 +751,7 @@ class ServerSelectionDialog(QDialog):
         main_layout = QVBoxLayout(self)
 
         header_label = QLabel("Available Server Configurations:")
-        header_label.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
+        header_label.setFont(cached_font("Segoe UI", 12, QFont.Weight.Bold))
         main_layout.addWidget(header_label)
         
         current_label = QLabel(f"Currently active: <b>{current_config['name']}</b>")
@@ -316,13 +761,8 @@ class ServerSelectionDialog(QDialog):
         self.list_widget = QListWidget()
         main_layout.addWidget(self.list_widget)
         
-        initial_selection_index = 0
-        
-        for idx, config in enumerate(self.configs):
-            item = QListWidgetItem(config['name'])
-            self.list_widget.addItem(item)
-            if config['name'] == current_config['name']:
-                initial_selection_index = idx
+        self.list_widget.addItems([config['name'] for config in self.configs])
+        initial_selection_index = self._name_index.get(current_config['name'], 0)
 
         if self.configs:
             self.list_widget.setCurrentRow(initial_selection_index)
@@ -413,22 +853,52 @@ class RefreshIntervalDialog(QDialog):
 
 class NextcloudMonitorApp(QMainWindow):
     """Main application window for the Nextcloud Monitor."""
+
+    _RIGHT_ALIGN = Qt.AlignmentFlag.AlignRight
+    # Status bar stylesheets, built once so update_status never formats QSS
+    _STATUS_QSS = {
+        color: f"color: {color}; font-weight: bold;"
+        for color in ("black", "blue", "green", "orange", "red")
+    }
     
     def __init__(self, initial_config, all_configs): 
         super().__init__()
+
+        # Fonts shared by every metric row, built once (QFont needs the QApplication)
+        self.metric_font = cached_font("Segoe UI", 10, QFont.Weight.Bold)
         
         self.server_configs = all_configs
         self.current_config = initial_config 
         self.metric_labels = {} # Stores QLabel references for dynamic updating
         self.app_list_text = QTextEdit()
         self.raw_data_text = QTextEdit()
-        self.thread_pool = QThreadPool()
+        # Shared pool, one thread per configured server so concurrent fetches overlap
+        self.thread_pool = QThreadPool.globalInstance()
+        self.thread_pool.setMaxThreadCount(max(1, min(MAX_FETCH_THREADS, len(all_configs))))
+        # Single-shot: re-armed only once the previous fetch has completed or failed
         self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.fetch_inflight = None # (url, token) of the fetch currently running, if any
+        # One signals object shared by every fetch, connected once instead of per refresh
+        self.worker_signals = WorkerSignals()
+        self.worker_signals.data_fetched.connect(self.update_gui_metrics)
+        self.worker_signals.error.connect(self.handle_fetch_error)
         self.is_dark_theme = False # New state for theme (False = Light, True = Dark)
         self.theme_toggle_action = None # Will be set in create_menu_bar
+        self.applied_theme_qss = None # Stylesheet currently set on the app
+        self.status_qss = None # Stylesheet currently set on the status bar
         
         # Customizable refresh interval
         self.refresh_interval_ms = DEFAULT_REFRESH_INTERVAL_MS
+        # Actual delay until the next fetch, stretched when the server responds slowly
+        self.next_refresh_delay_ms = self.refresh_interval_ms
+        self.fetch_latency_avg = {} # Moving average of fetch time (s) per server URL
+        # Last rendered snapshot per (url, token): {'ts', 'fetched_at', 'snapshot'}
+        self.snapshot_cache = {}
+        self.last_apps_hash = None # CRC32 of the app list text currently shown
+        self.pending_raw_data = None # Response not yet serialized into the hidden Raw Data tab
+        self.displayed_snapshot = None # Snapshot currently on screen, replayed into lazily built tabs
+        self.views_dirty = False # Set when an error message replaced the rendered data
         
         self.setWindowTitle(f"Gobytego Nextcloud Monitor: {initial_config['url']}")
         self.setGeometry(100, 100, 702, 550)
@@ -455,7 +925,7 @@ class NextcloudMonitorApp(QMainWindow):
 
         # 2. Header
         header_label = QLabel("Gobytego Nextcloud Metrics Dashboard")
-        header_label.setFont(QFont("Segoe UI", 16, QFont.Weight.Bold))
+        header_label.setFont(cached_font("Segoe UI", 16, QFont.Weight.Bold))
         header_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         main_layout.addWidget(header_label)
 
@@ -470,7 +940,7 @@ class NextcloudMonitorApp(QMainWindow):
         button_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
         
         refresh_button = QPushButton("Manual Refresh")
-        refresh_button.clicked.connect(self.start_fetch)
+        refresh_button.clicked.connect(self.manual_refresh)
         
         button_layout.addWidget(refresh_button)
         main_layout.addWidget(button_frame)
@@ -517,13 +987,59 @@ class NextcloudMonitorApp(QMainWindow):
 
 
     def create_tabs(self):
-        """Creates and populates the tab widgets."""
-        self.tabs.addTab(self.create_core_metrics_tab(), "Core Metrics")
-        self.tabs.addTab(self.create_system_health_tab(), "System Health")
-        self.tabs.addTab(self.create_activity_security_tab(), "Activity && Security")
-        self.tabs.addTab(self.create_storage_overview_tab(), "Storage")
-        self.tabs.addTab(self.create_config_details_tab(), "System Config")
-        self.tabs.addTab(self.create_raw_data_tab(), "Raw Data")
+        """Creates the tab widgets. Only the first tab is built now; the
+           others get a placeholder until they are first opened."""
+        self.tab_builders = (
+            (self.create_core_metrics_tab, "Core Metrics"),
+            (self.create_system_health_tab, "System Health"),
+            (self.create_activity_security_tab, "Activity && Security"),
+            (self.create_storage_overview_tab, "Storage"),
+            (self.create_config_details_tab, "System Config"),
+            (self.create_raw_data_tab, "Raw Data"),
+        )
+        self.raw_data_tab_index = len(self.tab_builders) - 1
+        self.built_tabs = {0}
+        for index, (builder, title) in enumerate(self.tab_builders):
+            self.tabs.addTab(builder() if index == 0 else QWidget(), title)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        self.refresh_label_refs()
+
+    def refresh_label_refs(self):
+        """Rebuilds the METRIC_SPEC-ordered label list (None for labels on unbuilt tabs)."""
+        self.label_refs = [self.metric_labels.get(spec[0]) for spec in METRIC_SPEC]
+
+    def ensure_tab_built(self, index):
+        """Replaces a placeholder tab with its real content and fills in the latest metrics."""
+        if index < 0 or index in self.built_tabs:
+            return
+        self.built_tabs.add(index)
+        builder, title = self.tab_builders[index]
+        placeholder = self.tabs.widget(index)
+        # Swapping the page would otherwise re-emit currentChanged
+        with QSignalBlocker(self.tabs):
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, builder(), title)
+            self.tabs.setCurrentIndex(index)
+        placeholder.deleteLater()
+        self.refresh_label_refs()
+        # Fill only the new labels; the app list and raw views live outside the
+        # tab pages and may hold newer messages (e.g. a fetch error)
+        if self.displayed_snapshot is not None:
+            for label, text in zip(self.label_refs, self.displayed_snapshot.values):
+                if label is not None and label.text() != text:
+                    label.setText(text)
+
+    def on_tab_changed(self, index):
+        """Builds tabs on first view and renders the raw JSON on demand."""
+        self.ensure_tab_built(index)
+        if index == self.raw_data_tab_index:
+            self.refresh_raw_data_view()
+
+    def refresh_raw_data_view(self):
+        """Writes any pending response into the Raw Data tab."""
+        if self.pending_raw_data is not None:
+            self.raw_data_text.setPlainText(dumps_pretty(self.pending_raw_data))
+            self.pending_raw_data = None
 
     def create_tab_content(self, title):
         """Helper to create a standard tab layout."""
@@ -542,7 +1058,7 @@ class NextcloudMonitorApp(QMainWindow):
         # Metric Label (Left)
         label = QLabel(label_text)
         if is_header:
-            label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+            label.setFont(self.metric_font)
             # Set a class for the header label for theme specific styling
             label.setObjectName("header") 
             # Original explicit style removed to allow QSS to control the color
@@ -551,12 +1067,12 @@ class NextcloudMonitorApp(QMainWindow):
         else:
             # Value Label (Right)
             value_label = QLabel("N/A")
-            value_label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+            value_label.setFont(self.metric_font)
             value_label.setObjectName(var_name) # Used to find the label later and for theme QSS
             self.metric_labels[var_name] = value_label
             
             layout.addWidget(label, row, 0)
-            layout.addWidget(value_label, row, 1, alignment=Qt.AlignmentFlag.AlignRight)
+            layout.addWidget(value_label, row, 1, alignment=self._RIGHT_ALIGN)
         
         return row
 
@@ -636,8 +1152,10 @@ class NextcloudMonitorApp(QMainWindow):
         # Add QTextEdit for scrollable list
         row = layout.rowCount()
         self.app_list_text.setReadOnly(True)
-        self.app_list_text.setText("Apps list loading...")
-        self.app_list_text.setFont(QFont("Segoe UI", 9))
+        # Plain text only, and no undo history for content replaced every refresh
+        self.app_list_text.setAcceptRichText(False)
+        self.app_list_text.document().setUndoRedoEnabled(False)
+        self.app_list_text.setFont(cached_font("Segoe UI", 9))
         
         layout.addWidget(self.app_list_text, row, 0, 1, 2)
         layout.setRowStretch(row, 1) # Allow the text widget to take up space
@@ -648,12 +1166,15 @@ class NextcloudMonitorApp(QMainWindow):
         tab, layout = self.create_tab_content("Raw Data (Debug)")
         
         header_label = QLabel("Raw JSON Response (Used for Debugging)")
-        header_label.setFont(QFont("Segoe UI", 10, QFont.Weight.Bold))
+        header_label.setFont(self.metric_font)
         layout.addWidget(header_label, 0, 0, 1, 2)
         
         self.raw_data_text.setReadOnly(True)
-        self.raw_data_text.setFont(QFont("Courier", 8))
-        self.raw_data_text.setText("Fetching raw data...")
+        self.raw_data_text.setAcceptRichText(False)
+        self.raw_data_text.document().setUndoRedoEnabled(False)
+        # Pretty JSON is already line-broken; skip re-wrapping on every update
+        self.raw_data_text.setLineWrapMode(QTextEdit.LineWrapMode.NoWrap)
+        self.raw_data_text.setFont(cached_font("Courier", 8))
         
         layout.addWidget(self.raw_data_text, 1, 0, 1, 2)
         layout.setRowStretch(1, 1)
@@ -661,21 +1182,23 @@ class NextcloudMonitorApp(QMainWindow):
         return tab
     
     def apply_theme(self, is_dark):
-        """Applies the dark or light theme stylesheet to the entire application,
-           blocking signals temporarily to prevent window resize shifts."""
+        """Applies the dark or light theme stylesheet to the entire application."""
         self.is_dark_theme = is_dark
         theme_qss = DARK_THEME_QSS if is_dark else LIGHT_THEME_QSS
         
-        # Apply the stylesheet to the singleton QApplication instance
+        # Apply the stylesheet to the singleton QApplication instance.
+        # Re-applying an identical stylesheet still forces a full style
+        # recomputation, and the themes are module constants, so identity suffices.
         app_instance = QApplication.instance()
-        if app_instance:
-            # 1. Block signals to prevent resize/layout events during style change
-            app_instance.blockSignals(True)
-            
-            app_instance.setStyleSheet(theme_qss)
-            
-            # 2. Re-enable signals
-            app_instance.blockSignals(False)
+        if app_instance and theme_qss is not self.applied_theme_qss:
+            self.applied_theme_qss = theme_qss
+            # Suspend repaints so the restyle lands as one frame; try/finally
+            # keeps the window from being left frozen if setStyleSheet raises
+            self.setUpdatesEnabled(False)
+            try:
+                app_instance.setStyleSheet(theme_qss)
+            finally:
+                self.setUpdatesEnabled(True)
         
         # Update the toggle action text
         if self.theme_toggle_action:
@@ -694,21 +1217,43 @@ class NextcloudMonitorApp(QMainWindow):
         
         self.setWindowTitle(f"Gobytego Nextcloud Monitor: {self.nc_url}")
         
-        # Reset all metrics to N/A while fetching
-        for label in self.metric_labels.values():
-            label.setText("N/A")
-            
-        self.app_list_text.setText("Apps list loading...")
-        self.raw_data_text.setText("Fetching raw data...")
+        # Switching back to a recently viewed server paints its last data right away
+        cached = self.snapshot_cache.get((self.nc_url, self.nc_token))
+        cache_age = time.monotonic() - cached['ts'] if cached is not None else None
+        if cached is not None and cache_age < SNAPSHOT_MAX_AGE_S + SNAPSHOT_SWR_WINDOW_S:
+            showing_cached = self.render_snapshot(cached['snapshot'])
+        else:
+            showing_cached = False
 
-        self.update_status(f"Monitoring server: {self.nc_url}...", "blue")
+        if not showing_cached:
+            # Reset all metrics to N/A while fetching
+            self.setUpdatesEnabled(False)
+            try:
+                for label in self.metric_labels.values():
+                    label.setText("N/A")
+                    
+                self.displayed_snapshot = None
+                self.app_list_text.setPlainText("Apps list loading...")
+                self.last_apps_hash = None
+                self.pending_raw_data = None
+                self.raw_data_text.setPlainText("Fetching raw data...")
+            finally:
+                self.setUpdatesEnabled(True)
+
+            self.update_status(f"Monitoring server: {self.nc_url}...", "blue")
         
-        # Start or restart the refresh timer
-        self.refresh_timer.stop()
-        self.refresh_timer.start(self.refresh_interval_ms)
+        self.next_refresh_delay_ms = self.refresh_interval_ms
         
+        if showing_cached and cache_age < SNAPSHOT_MAX_AGE_S:
+            # Fresh enough: the timer will pick up the next fetch
+            self.refresh_timer.start(self.refresh_interval_ms)
+            self.update_status(f"Showing data from {cached['fetched_at']} for {self.nc_url}.", "green")
+            return
+
         # Immediately start the fetch operation
         self.start_fetch()
+        if showing_cached:
+            self.update_status(f"Showing data from {cached['fetched_at']}, refreshing {self.nc_url}...", "blue")
 
     def set_refresh_interval_dialog(self):
         """Opens a dialog to set the new refresh interval."""
@@ -717,8 +1262,7 @@ class NextcloudMonitorApp(QMainWindow):
             new_interval_ms = dialog.get_new_interval()
             if new_interval_ms != self.refresh_interval_ms:
                 self.refresh_interval_ms = new_interval_ms
-                self.refresh_timer.stop()
-                self.refresh_timer.start(self.refresh_interval_ms)
+                self.next_refresh_delay_ms = new_interval_ms
                 
                 new_interval_sec = self.refresh_interval_ms // 1000
                 self.update_status(f"Refresh rate set to {new_interval_sec} seconds. Fetching now...", "orange")
@@ -734,187 +1278,171 @@ class NextcloudMonitorApp(QMainWindow):
                 self.apply_new_config(new_config)
 
 
+    def adapt_refresh_delay(self, fetch_seconds):
+        """Returns the next refresh delay in ms, backing off when the server is slow to respond."""
+        avg = self.fetch_latency_avg.get(self.nc_url)
+        avg = fetch_seconds if avg is None else avg + LATENCY_EMA_ALPHA * (fetch_seconds - avg)
+        self.fetch_latency_avg[self.nc_url] = avg
+
+        interval_ms = self.refresh_interval_ms
+        backoff_ms = min(interval_ms * MAX_BACKOFF_MULTIPLIER, avg * LATENCY_BACKOFF_FACTOR * 1000)
+        return int(max(interval_ms, backoff_ms))
+
+    def manual_refresh(self):
+        """Bypasses the response cache so a user-driven refresh always queries the server."""
+        expire_cached_metrics(self.nc_url, self.nc_token)
+        self.start_fetch()
+
     def start_fetch(self):
-        """Initializes the worker thread to fetch metrics."""
+        """Initializes the worker thread to fetch metrics, unless one is already running for this server."""
+        server = (self.nc_url, self.nc_token)
+        if self.fetch_inflight == server:
+            return
+        self.fetch_inflight = server
+        # The timer is re-armed when this fetch completes, so requests never pile up
+        self.refresh_timer.stop()
+
         # Calculate next refresh time for status bar
-        next_refresh_time = datetime.datetime.now() + datetime.timedelta(milliseconds=self.refresh_interval_ms)
-        status_msg = f"Fetching new data... Next refresh at {next_refresh_time.strftime('%H:%M:%S')}."
+        next_refresh_time = time.strftime('%H:%M:%S', time.localtime(time.time() + self.next_refresh_delay_ms / 1000))
+        status_msg = f"Fetching new data... Next refresh at {next_refresh_time}."
         self.update_status(status_msg, "blue")
 
-        # Create signals object
-        signals = WorkerSignals()
-        signals.data_fetched.connect(self.update_gui_metrics)
-        signals.error.connect(self.handle_fetch_error)
-
         # Create worker and run it in the thread pool
-        worker = NextcloudWorker(self.nc_url, self.nc_token, signals)
+        worker = NextcloudWorker(self.nc_url, self.nc_token, self.worker_signals)
         self.thread_pool.start(worker)
 
-    def handle_fetch_error(self, error_message):
+    def handle_fetch_error(self, error_message, server=None):
         """Handles errors from the worker thread."""
-        self.raw_data_text.setText(f"ERROR: Could not fetch data. Check your URL/Token.\n\n{error_message}")
+        # Release the in-flight marker even if the user has switched servers
+        # meanwhile, or start_fetch would refuse to poll that server again
+        if server is None or self.fetch_inflight == server:
+            self.fetch_inflight = None
+        if server is not None and server != (self.nc_url, self.nc_token):
+            # Failure of a fetch for a server that is no longer shown
+            return
+        self.refresh_timer.start(self.next_refresh_delay_ms)
+
+        self.pending_raw_data = None
+        # The next success must render in full, even if its payload is unchanged
+        self.views_dirty = True
+        self.raw_data_text.setPlainText(f"ERROR: Could not fetch data. Check your URL/Token.\n\n{error_message}")
         self.update_status(f"Error: {error_message}", "red")
 
     def update_status(self, message, color="black"):
         """Updates the status bar message and color."""
-        style = f"color: {color}; font-weight: bold;"
-        self.status_bar.setStyleSheet(style)
+        style = self._STATUS_QSS.get(color)
+        if style is None:
+            style = f"color: {color}; font-weight: bold;"
+        # Re-parsing QSS is costly; only restyle when the color actually changes
+        if style != self.status_qss:
+            self.status_qss = style
+            self.status_bar.setStyleSheet(style)
         self.status_bar.showMessage(message)
 
-    def update_gui_metrics(self, data):
-        """Processes the fetched data and updates the GUI labels."""
-        try:
-            # Update Raw Data Tab first
-            self.raw_data_text.setText(json.dumps(data, indent=2))
-            
-            # --- Extract Data ---
-            nc_data = data['ocs']['data']['nextcloud']
-            server_data = data['ocs']['data']['server']
-            active_users = data['ocs']['data']['activeUsers']
-            system_info = nc_data.get('system', {})
-            db_info = server_data.get('database', {})
-            php_info = server_data.get('php', {})
-            storage_data = nc_data.get('storage', {})
-            shares = nc_data.get('shares', {})
-            opcache_stats = php_info.get('opcache', {}).get('opcache_statistics', {})
-            opcache_memory = php_info.get('opcache', {}).get('memory_usage', {})
-
-            # --- System Health Metrics (with KB to Bytes correction) ---
-            ram_total_kb = safe_int(system_info.get('mem_total', 0))
-            ram_free_kb = safe_int(system_info.get('mem_free', 0))
-            ram_total = ram_total_kb * KB_TO_BYTES
-            ram_used = (ram_total_kb - ram_free_kb) * KB_TO_BYTES
-            
-            swap_total_kb = safe_int(system_info.get('swap_total', 0))
-            swap_free_kb = safe_int(system_info.get('swap_free', 0))
-            swap_total = swap_total_kb * KB_TO_BYTES
-            swap_used = (swap_total_kb - swap_free_kb) * KB_TO_BYTES
-            
-            cpuload_data = system_info.get('cpuload', [0, 0, 0])
-            cpu_load = [cpuload_data[i] if len(cpuload_data) > i else 0 for i in range(3)]
-            
-            opcache_hit_rate = opcache_stats.get('opcache_hit_rate', 0.0)
-            opcache_used_memory = opcache_memory.get('used_memory', 0)
-            wasted_memory = opcache_memory.get('wasted_memory', 0)
-
-            # PHP Uptime calculation
-            start_time_ts = safe_int(opcache_stats.get('start_time', 0))
-            current_time_ts = int(time.time())
-            uptime_seconds = current_time_ts - start_time_ts if start_time_ts > 0 and current_time_ts > start_time_ts else 0
-            uptime_display = format_timedelta(uptime_seconds)
-
-            # Storage Overview (Fallback logic retained)
-            storage_free = safe_int(storage_data.get('free'))
-            storage_used = safe_int(storage_data.get('used'))
-            if storage_used == 0 and storage_free == 0:
-                storage_free = safe_int(system_info.get('freespace'))
-                storage_used_display = "0 Bytes (Data Missing)"
-                storage_free_display = f"{format_bytes(storage_free)} (System Freespace)"
-            else:
-                storage_used_display = format_bytes(storage_used)
-                storage_free_display = format_bytes(storage_free)
-
-            # --- FIX: Ensure App List Content is always a string ---
-            app_data = data['ocs']['data'].get('app', None)
-            enabled_app_lines_str = "APP DATA IS MISSING FROM NEXTCLOUD API RESPONSE."
-            enabled_app_count = "N/A (Data Missing)"
-            total_app_count = "N/A (Data Missing)"
-
-            if app_data and isinstance(app_data, dict):
-                enabled_apps = app_data.get('enabled', [])
-                installed_apps = app_data.get('installed', [])
-
-                if isinstance(enabled_apps, list) and isinstance(installed_apps, list):
-                    temp_lines = []
-                    for app in enabled_apps:
-                        if isinstance(app, dict):
-                            app_name = app.get('id', 'Unknown App')
-                            app_version = app.get('version', 'N/A')
-                            temp_lines.append(f"{app_name}: v{app_version}")
-                        elif isinstance(app, str):
-                            temp_lines.append(f"{app}: vN/A")
-                    
-                    enabled_app_count = len(enabled_apps)
-                    total_app_count = len(installed_apps)
-                    # This joins the list of strings into one single string with newlines
-                    enabled_app_lines_str = "\n".join(sorted(temp_lines))
-                # If lists are not lists, the default string message is kept
-
-            # --- Update UI Labels ---
-            updates = {
-                # Core Metrics
-                'version_val': system_info.get('version', 'N/A'),
-                'php_uptime_val': uptime_display,
-                'users_val': str(storage_data.get('num_users', 0)),
-                'files_val': f"{storage_data.get('num_files', 0):,}",
-                'webserver_val': server_data.get('webserver', 'N/A'),
-                'cpunum_val': system_info.get('cpunum', 'N/A'),
-
-                # Activity & Security
-                'active5m_val': str(active_users.get('last5minutes', 0)),
-                'active1h_val': str(active_users.get('last1hour', 0)),
-                'active24h_val': str(active_users.get('last24hours', 0)),
-                'maintenance_val': 'Yes' if system_info.get('maintenance', False) else 'No',
-                'failed_logins_val': str(system_info.get('failing_login_attempts', 0)),
-                'total_shares_val': str(shares.get('num_shares', 0)),
-                'local_shares_val': str(shares.get('num_shares_user', 0)),
-                'federated_shares_val': str(shares.get('num_fed_shares_sent', 0)),
-                'public_shares_val': str(shares.get('num_shares_link', 0)),
-                
-                # System Health (Fixed Units)
-                'ram_used_val': format_bytes(ram_used),
-                'ram_total_val': format_bytes(ram_total),
-                'swap_used_val': format_bytes(swap_used),
-                'cpu1m_val': f"{cpu_load[0]:.2f}",
-                'cpu5m_val': f"{cpu_load[1]:.2f}",
-                'cpu15m_val': f"{cpu_load[2]:.2f}",
-                'opcache_hit_rate_val': f"{opcache_hit_rate:.2f}%",
-                'opcache_used_val': format_bytes(opcache_used_memory),
-                'opcache_wasted_val': format_bytes(wasted_memory),
-
-                # Storage Overview
-                'storage_used_val': storage_used_display,
-                'storage_free_val': storage_free_display,
-                'db_size_val': format_bytes(safe_int(db_info.get('size'))),
-                # Use the processed count variables
-                'enabled_apps_val': str(enabled_app_count),
-                'app_count_val': str(total_app_count),
-                
-                # Configuration
-                'php_val': php_info.get('version', 'N/A'),
-                'php_memory_limit_val': format_bytes(php_info.get('memory_limit', 0)),
-                'php_max_exec_val': f"{php_info.get('max_execution_time', 'N/A')}s",
-                'db_type_val': db_info.get('type', 'N/A'),
-                'db_version_val': db_info.get('version', 'N/A'),
-                'db_host_val': db_info.get('host', 'N/A'),
+    def update_gui_metrics(self, snapshot):
+        """Renders a freshly fetched NcSnapshot, caches it and re-arms the refresh timer."""
+        now = time.time()
+        current_time = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        if not snapshot.stale:
+            self.snapshot_cache[snapshot.server] = {
+                'ts': time.monotonic(),
+                'fetched_at': current_time,
+                'snapshot': snapshot,
             }
 
-            for key, value in updates.items():
-                if key in self.metric_labels:
-                    self.metric_labels[key].setText(str(value))
-
-            # Update the QTextEdit for the enabled apps list (Now guaranteed to be a string)
-            self.app_list_text.setText(enabled_app_lines_str)
-            
-            # Update status with next refresh time
-            current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            next_refresh_time = datetime.datetime.now() + datetime.timedelta(milliseconds=self.refresh_interval_ms)
+        # Release the in-flight marker even if the user has switched servers
+        # meanwhile, or start_fetch would refuse to poll that server again
+        if snapshot.server is None or self.fetch_inflight == snapshot.server:
+            self.fetch_inflight = None
+
+        # A fetch for the previous server can land after switching; keep it cached only
+        if snapshot.server is not None and snapshot.server != (self.nc_url, self.nc_token):
+            return
+
+        # Arm the next tick now that this fetch is done, slowing down if the
+        # server took long to answer
+        self.next_refresh_delay_ms = self.adapt_refresh_delay(snapshot.fetch_seconds)
+        self.refresh_timer.start(self.next_refresh_delay_ms)
+
+        # fetch_metrics hands back the very same dict for a byte-identical payload;
+        # if it also formats the same (uptime can still tick), only the status changes
+        previous = self.displayed_snapshot
+        unchanged = (not self.views_dirty and previous is not None
+                     and snapshot.raw_data is previous.raw_data and snapshot == previous)
+        if not unchanged and not self.render_snapshot(snapshot):
+            return
+
+        # Update status with next refresh time
+        next_refresh_time = time.strftime('%H:%M:%S', time.localtime(now + self.next_refresh_delay_ms / 1000))
+        if snapshot.stale:
+            status_msg = (
+                f"Server unreachable at {current_time}, showing last known data. "
+                f"Retrying at {next_refresh_time}."
+            )
+            self.update_status(status_msg, "orange")
+        else:
             status_msg = (
                 f"Last updated: {current_time}. "
-                f"Next check at {next_refresh_time.strftime('%H:%M:%S')} "
+                f"Next check at {next_refresh_time} "
                 f"({self.refresh_interval_ms // 1000}s interval)."
             )
+            if self.next_refresh_delay_ms > self.refresh_interval_ms:
+                status_msg += f" Slowed to {self.next_refresh_delay_ms // 1000}s: server responding slowly."
             self.update_status(status_msg, "green")
 
+    def render_snapshot(self, snapshot):
+        """Writes an NcSnapshot into the GUI labels. Returns False if the data could not be processed."""
+        try:
+            # All parsing and formatting happened in the worker; only widget writes remain
+            self.displayed_snapshot = snapshot
+
+            # Write every widget with repaints suspended so the refresh costs a
+            # single layout pass; re-enabling updates schedules the repaint
+            self.setUpdatesEnabled(False)
+            try:
+                # The pretty JSON is only built while the Raw Data tab is showing
+                self.pending_raw_data = snapshot.raw_data
+                if self.tabs.currentIndex() == self.raw_data_tab_index:
+                    self.refresh_raw_data_view()
+
+                # Skip unchanged labels: setText invalidates layout even for identical text
+                for label, text in zip(self.label_refs, snapshot.values):
+                    if label is not None and label.text() != text:
+                        label.setText(text)
+
+                # Update the QTextEdit for the enabled apps list, only rebuilding
+                # its document when the list actually changed
+                apps_hash = zlib.crc32(snapshot.app_list.encode())
+                if apps_hash != self.last_apps_hash:
+                    self.last_apps_hash = apps_hash
+                    self.app_list_text.setPlainText(snapshot.app_list)
+            finally:
+                self.setUpdatesEnabled(True)
+
         except Exception as e:
             # Added a more detailed message in case of data processing failure
             error_msg = f"Failed to process fetched data: {type(e).__name__}: {e}"
             QMessageBox.critical(self, "Data Processing Error", error_msg)
             self.update_status("Error processing data", "red")
+            return False
+
+        self.views_dirty = False
+        return True
 
 
 if __name__ == "__main__":
     
+    # Log level can be raised or lowered via NCMONITOR_LOG (e.g. DEBUG, ERROR).
+    # getLevelName maps known names to their number and returns a string otherwise
+    log_level_name = (os.environ.get('NCMONITOR_LOG') or 'WARNING').upper()
+    log_level = logging.getLevelName(log_level_name)
+    level_known = isinstance(log_level, int)
+    if not level_known:
+        log_level = logging.WARNING
+    logging.basicConfig(level=log_level, format="%(levelname)s: %(message)s")
+    if not level_known:
+        logger.warning("Unknown NCMONITOR_LOG level %r, using WARNING.", log_level_name)
+
     # --- STEP 1: LOAD ALL CONFIGURATIONS ---
     script_dir = os.path.dirname(os.path.abspath(__file__))
     all_configs = find_and_load_configs(script_dir)
@@ -931,11 +1459,12 @@ if __name__ == "__main__":
 
     # --- STEP 2: RUN PYQT GUI ---
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(close_sessions)
     
     # Optional: Set a nice icon (Qt needs a proper path, but we'll skip the actual file check for portability)
     ICON_FILE_PATH = os.path.join(script_dir, "gbgicon.png") 
     if os.path.exists(ICON_FILE_PATH):
-        app.setWindowIcon(QIcon(ICON_FILE_PATH))
+        app.setWindowIcon(cached_icon(ICON_FILE_PATH))
 
     window = NextcloudMonitorApp(INITIAL_CONFIG, all_configs) 
     window.show()
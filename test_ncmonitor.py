@@ -0,0 +1,31 @@
+"""Qt-free checks for the pure formatting helpers in ncmonitor_qt."""
+import unittest
+
+from ncmonitor_qt import format_bytes
+
+
+class FormatBytesTest(unittest.TestCase):
+
+    def test_unit_boundaries(self):
+        # Same output as the original math.log-based formula
+        self.assertEqual(format_bytes(0), '0 Bytes')
+        self.assertEqual(format_bytes(1023), '1023.00 Bytes')
+        self.assertEqual(format_bytes(1024), '1.00 KB')
+        self.assertEqual(format_bytes(1025), '1.00 KB')
+        self.assertEqual(format_bytes(1048575), '1024.00 KB')
+        self.assertEqual(format_bytes(1048576), '1.00 MB')
+
+    def test_just_below_large_power_stays_in_lower_unit(self):
+        # math.log rounded these up a unit ("1.00 PB", "1.00 YB"); the
+        # integer bit_length computation keeps them in the unit below
+        self.assertEqual(format_bytes(1024 ** 5 - 1), '1024.00 TB')
+        self.assertEqual(format_bytes(1024 ** 8 - 1), '1024.00 ZB')
+
+    def test_non_int_input(self):
+        self.assertEqual(format_bytes('123.0'), '123.00 Bytes')
+        self.assertEqual(format_bytes(None), '0 Bytes')
+        self.assertEqual(format_bytes(2048, decimals=0), '2 KB')
+
+
+if __name__ == '__main__':
+    unittest.main()